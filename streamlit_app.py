@@ -1,95 +1,566 @@
 import streamlit as st
 import cv2
+import io
 import os
 import zipfile
 import tempfile
-from PIL import Image
 import re
+import atexit
+import hashlib
+import shutil
+import subprocess
+import threading
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from functools import partial
+from itertools import chain
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
-def extract_screenshots_at_timestamps(video_path, timestamps):
+try:
+    # Optional: GPU-resident decode through NVDEC
+    import torch
+    from torchcodec.decoders import VideoDecoder
+except ImportError:
+    torch = None
+    VideoDecoder = None
+
+# Timestamp lists at least this long, spaced closer than a GOP on average,
+# are decoded in one forward pass instead of one seek per timestamp
+SEQUENTIAL_MIN_TIMESTAMPS = 8
+# OpenCV doesn't expose the keyframe interval; this is x264's default keyint
+ASSUMED_GOP_FRAMES = 250
+# Below this many timestamps, pool startup costs more than it saves
+PARALLEL_MIN_TIMESTAMPS = 4
+DEFAULT_JPEG_QUALITY = 85
+# Frames decoded per NVDEC call, bounds GPU memory for long timestamp lists
+NVDEC_BATCH_SIZE = 32
+# Number of distinct uploads whose spooled video and extracted screenshots are kept across reruns
+SCREENSHOT_CACHE_VIDEOS = 4
+# JPEG bytes kept per cached video, oldest screenshots are dropped past this
+SCREENSHOT_CACHE_BYTES_PER_VIDEO = 64 * 1024 * 1024
+# Timestamp at the start of a line, leading whitespace (but not blank lines) allowed
+TIMESTAMP_PATTERN = re.compile(r'^[^\S\n]*(\d+):(\d+)', re.MULTILINE)
+
+cv2.setNumThreads(max(1, os.cpu_count() or 1))
+
+@st.cache_resource(show_spinner=False)
+def _log_jpeg_backend():
+    """
+    OpenCV build ki JPEG library server log mein print karta hai (ek baar per process)
+    """
+    # opencv-python wheels bundle libjpeg-turbo, which has a native BGR input path
+    for line in cv2.getBuildInformation().splitlines():
+        if line.strip().startswith("JPEG:"):
+            print(f"OpenCV {line.strip()}")
+
+def _encode_jpeg(frame, quality):
+    """
+    Frame ko JPEG bytes mein encode karta hai (None agar encode fail ho)
+    """
+    # Single Huffman pass, baseline (non-progressive) output
+    ok, buffer = cv2.imencode('.jpg', frame, [
+        int(cv2.IMWRITE_JPEG_QUALITY), quality,
+        int(cv2.IMWRITE_JPEG_OPTIMIZE), 0,
+        int(cv2.IMWRITE_JPEG_PROGRESSIVE), 0
+    ])
+    return buffer.tobytes() if ok else None
+
+def _jpeg_quality_to_qscale(quality):
+    """
+    JPEG quality (1-100) ko ffmpeg mjpeg -q:v scale (2 best, 31 worst) par map karta hai
+    """
+    return round(2 + (100 - quality) * 29 / 99)
+
+@st.cache_resource(show_spinner=False)
+def _ffmpeg_capabilities():
+    """
+    (ffmpeg available, CUDA device usable) return karta hai, ek baar per process check hota hai
+    """
+    try:
+        subprocess.run(["ffmpeg", "-hide_banner", "-version"], capture_output=True, check=True)
+    except (OSError, subprocess.CalledProcessError):
+        return False, False
+    
+    # Distro builds list cuda in -hwaccels without a GPU, so actually create the device
+    result = subprocess.run(
+        ["ffmpeg", "-hide_banner", "-loglevel", "error",
+         "-init_hw_device", "cuda", "-f", "lavfi", "-i", "nullsrc",
+         "-frames:v", "1", "-f", "null", "-"],
+        capture_output=True
+    )
+    return True, result.returncode == 0
+
+def _ffmpeg_extract_frame(video_path, timestamp_seconds, use_cuda=False, approximate_seek=False,
+                          quality=DEFAULT_JPEG_QUALITY):
+    """
+    ffmpeg se ek single frame JPEG bytes mein extract karta hai, -ss input side par taake sirf nearest keyframe se decode ho
+    """
+    command = ["ffmpeg", "-hide_banner", "-loglevel", "error", "-y"]
+    if use_cuda:
+        # Frames are downloaded from the GPU automatically since the mjpeg encoder runs on CPU
+        command += ["-hwaccel", "cuda"]
+    if approximate_seek:
+        # Take the keyframe at/before the timestamp instead of decoding forward to the exact frame
+        command += ["-noaccurate_seek"]
+    command += [
+        "-ss", f"{timestamp_seconds}",
+        "-i", video_path,
+        "-frames:v", "1",
+        "-q:v", str(_jpeg_quality_to_qscale(quality)),
+        # JPEG goes straight to stdout, nothing touches the disk
+        "-f", "image2pipe", "-c:v", "mjpeg", "pipe:1"
+    ]
+    
+    result = subprocess.run(command, capture_output=True)
+    if result.returncode != 0 or not result.stdout:
+        return None
+    return result.stdout
+
+def _probe_duration(video_path, cap):
+    """
+    Video duration (seconds) container header se ffprobe ke zariye nikalta hai
+    """
+    try:
+        result = subprocess.run(
+            ["ffprobe", "-v", "error", "-show_entries", "format=duration",
+             "-of", "default=noprint_wrappers=1:nokey=1", video_path],
+            capture_output=True, text=True, check=True
+        )
+        return float(result.stdout)
+    except (OSError, subprocess.CalledProcessError, ValueError):
+        # No ffprobe or no duration in the header, fall back to OpenCV's frame count
+        return cap.get(cv2.CAP_PROP_FRAME_COUNT) / cap.get(cv2.CAP_PROP_FPS)
+
+@st.cache_data(show_spinner=False)
+def _probe_video(video_path):
+    """
+    Video ka fps aur duration return karta hai, reruns par header dobara parse nahi hota
+    """
+    cap = cv2.VideoCapture(video_path, cv2.CAP_FFMPEG)
+    # Kept as a float, truncating 29.97 to 29 puts 2:00 almost 4 seconds early
+    fps = cap.get(cv2.CAP_PROP_FPS)
+    duration = _probe_duration(video_path, cap)
+    cap.release()
+    
+    return fps, duration
+
+def _should_decode_sequentially(frame_positions):
+    """
+    Check karta hai ke timestamps itne dense hain ke ek forward pass seeks se sasta pare
+    """
+    if len(frame_positions) < SEQUENTIAL_MIN_TIMESTAMPS:
+        return False
+    
+    average_spacing = (frame_positions[-1] - frame_positions[0]) / (len(frame_positions) - 1)
+    return average_spacing <= ASSUMED_GOP_FRAMES
+
+def _read_frames_sequentially(cap, frame_positions):
     """
-    Video se user-defined timestamps par screenshots extract karta hai
+    Sorted frame positions ke frames ek hi forward decode pass mein read karta hai
     """
-    cap = cv2.VideoCapture(video_path)
+    pending = deque(frame_positions)
+    cap.set(cv2.CAP_PROP_POS_FRAMES, pending[0])
+    frame_count = pending[0]
     
-    fps = int(cap.get(cv2.CAP_PROP_FPS))
-    total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-    duration = total_frames / fps
+    while pending and cap.grab():
+        # grab() skips the BGR conversion, only the frames we keep go through retrieve()
+        while pending and pending[0] <= frame_count:
+            pending.popleft()
+            yield cap.retrieve()
+        frame_count += 1
     
-    temp_dir = tempfile.mkdtemp()
-    screenshot_paths = []
+    # Video ended before the remaining targets
+    for _ in pending:
+        yield False, None
+
+@st.cache_resource(show_spinner=False, max_entries=SCREENSHOT_CACHE_VIDEOS)
+def _open_nvdec_decoder(video_key, _video_path):
+    """
+    torchcodec ka CUDA (NVDEC) decoder aur uska lock return karta hai, torchcodec ya GPU na ho to None
+    
+    Cache video_key par hota hai, _video_path sirf decoder kholne ke liye hai (wo file baad mein delete ho sakti hai)
+    """
+    if VideoDecoder is None or not torch.cuda.is_available():
+        return None
+    
+    try:
+        # One ffmpeg thread is enough, the CPU only demuxes on this path.
+        # "approximate" trusts the header instead of scanning the whole file on open; unlike
+        # ffmpeg's -noaccurate_seek it doesn't snap to keyframes, so the UI toggle has no effect here.
+        decoder = VideoDecoder(
+            _video_path,
+            device="cuda",
+            num_ffmpeg_threads=1,
+            seek_mode="approximate"
+        )
+    except (RuntimeError, ValueError):
+        return None
+    
+    # Cached across sessions, and the decoder's seek state isn't thread-safe.
+    # 'failed' is set once the stream fails to decode, so later runs go straight to ffmpeg/OpenCV
+    return {'decoder': decoder, 'lock': threading.Lock(), 'failed': False}
+
+def _nvdec_images(decoder, decoder_lock, seconds):
+    """
+    Diye gaye timestamps ke frames GPU par decode karke BGR numpy images return karta hai
+    """
+    with decoder_lock:
+        # Seek by presentation time, so no frame index is derived from the probed fps
+        frames = decoder.get_frames_played_at(seconds=seconds)
+    
+    # RGB CHW -> contiguous BGR HWC on the GPU, then one device-to-host copy per call
+    return frames.data[:, [2, 1, 0]].permute(0, 2, 3, 1).contiguous().cpu().numpy()
+
+def _extract_with_nvdec(nvdec, video_path, jobs, options):
+    """
+    Timestamps ko GPU par batches mein decode karke extract karta hai, jo frames GPU na de sake wo ffmpeg/OpenCV se
+    """
+    decoder, decoder_lock = nvdec['decoder'], nvdec['lock']
+    # The container duration used to validate timestamps can run past the video stream
+    end_seconds = getattr(decoder.metadata, 'end_stream_seconds', None)
+    # Handed to ffmpeg/OpenCV in one call at the end, so they still get the forward pass or the pool
+    fallback_jobs = []
+    
+    for start in range(0, len(jobs), NVDEC_BATCH_SIZE):
+        batch = []
+        for job in jobs[start:start + NVDEC_BATCH_SIZE]:
+            if end_seconds is not None and job[2] >= end_seconds:
+                yield job, None, False
+            else:
+                batch.append(job)
+        if not batch:
+            continue
+        
+        try:
+            images = _nvdec_images(decoder, decoder_lock, [job[2] for job in batch])
+        except (RuntimeError, IndexError, ValueError):
+            # One bad timestamp fails the whole call, retry this batch one timestamp at a time
+            for position, job in enumerate(batch):
+                try:
+                    image = _nvdec_images(decoder, decoder_lock, [job[2]])[0]
+                except (IndexError, ValueError):
+                    # NVDEC can't seek to this one timestamp, let ffmpeg/OpenCV try it
+                    fallback_jobs.append(job)
+                except RuntimeError:
+                    # The stream itself fails to decode, stop using NVDEC for this video
+                    nvdec['failed'] = True
+                    fallback_jobs.extend(batch[position:])
+                    fallback_jobs.extend(jobs[start + NVDEC_BATCH_SIZE:])
+                    break
+                else:
+                    yield job, _encode_jpeg(image, options['quality']), False
+            if nvdec['failed']:
+                break
+            continue
+        
+        for job, image in zip(batch, images):
+            yield job, _encode_jpeg(image, options['quality']), False
+    
+    if fallback_jobs:
+        yield from _extract_with_ffmpeg_or_opencv(video_path, fallback_jobs, options)
+
+def _extract_one(video_path, timestamp_seconds, fps, use_ffmpeg, use_cuda, approximate_seek, quality):
+    """
+    Ek timestamp ka screenshot extract karta hai, returns (jpeg_bytes, cuda_failed)
+    """
+    if use_ffmpeg:
+        jpeg_bytes = _ffmpeg_extract_frame(
+            video_path, timestamp_seconds, use_cuda, approximate_seek, quality
+        )
+        if jpeg_bytes is None and use_cuda:
+            # NVDEC init failed (no GPU or unsupported codec), retry on CPU decode
+            jpeg_bytes = _ffmpeg_extract_frame(
+                video_path, timestamp_seconds, approximate_seek=approximate_seek, quality=quality
+            )
+            return jpeg_bytes, jpeg_bytes is not None
+        return jpeg_bytes, False
+    
+    # Each call opens its own capture, VideoCapture isn't safe to share between threads
+    cap = cv2.VideoCapture(video_path, cv2.CAP_FFMPEG)
+    cap.set(cv2.CAP_PROP_POS_FRAMES, round(timestamp_seconds * fps))
+    ret, frame = cap.read()
+    cap.release()
+    
+    return (_encode_jpeg(frame, quality) if ret else None), False
+
+def _extract_sequentially(video_path, jobs, fps, quality):
+    """
+    Dense timestamps ko ek forward decode pass mein extract karta hai
+    """
+    frame_positions = [round(timestamp_seconds * fps) for _, _, timestamp_seconds, _ in jobs]
+    
+    cap = cv2.VideoCapture(video_path, cv2.CAP_FFMPEG)
+    try:
+        for job, (ret, frame) in zip(jobs, _read_frames_sequentially(cap, frame_positions)):
+            yield job, (_encode_jpeg(frame, quality) if ret else None), False
+    finally:
+        cap.release()
+
+def _extract_serially(video_path, jobs, options):
+    """
+    Timestamps ko ek ek karke isi thread mein extract karta hai
+    """
+    # Only ffmpeg's -noaccurate_seek snaps to keyframes, the OpenCV fallback always seeks exactly
+    approximate = options['use_ffmpeg'] and options['approximate_seek']
+    for job in jobs:
+        jpeg_bytes, cuda_failed = _extract_one(video_path, job[2], **options)
+        if cuda_failed:
+            # NVDEC can't decode this video, stay on CPU decode for the rest of the run
+            options['use_cuda'] = False
+        yield job, jpeg_bytes, approximate
+
+def _extract_in_parallel(video_path, jobs, options):
+    """
+    Timestamps ko ThreadPoolExecutor par parallel extract karta hai, completion order mein yield karta hai
+    """
+    if options['use_cuda']:
+        # Trial frame first, so an NVDEC failure on this video doesn't cost every job a failed ffmpeg run
+        yield from _extract_serially(video_path, jobs[:1], options)
+        jobs = jobs[1:]
+    
+    max_workers = min(os.cpu_count() or 1, len(jobs))
+    approximate = options['use_ffmpeg'] and options['approximate_seek']
+    
+    # Threads, not processes: subprocess.run, VideoCapture.read and cv2.imencode all release the GIL,
+    # and worker processes can't unpickle functions from a Streamlit script that reruns as __main__
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            executor.submit(_extract_one, video_path, job[2], **options): job
+            for job in jobs
+        }
+        for future in as_completed(futures):
+            jpeg_bytes, _ = future.result()
+            yield futures[future], jpeg_bytes, approximate
+
+def _extract_with_ffmpeg_or_opencv(video_path, jobs, options):
+    """
+    Timestamps ki density aur count ke hisaab se ffmpeg/OpenCV extraction strategy chunta hai
+    
+    Har extraction strategy (job, jpeg_bytes, approximate) yield karti hai, approximate yani frame keyframe par snap hua
+    """
+    frame_positions = [round(timestamp_seconds * options['fps']) for _, _, timestamp_seconds, _ in jobs]
+    if _should_decode_sequentially(frame_positions):
+        return _extract_sequentially(video_path, jobs, options['fps'], options['quality'])
+    if len(jobs) < PARALLEL_MIN_TIMESTAMPS:
+        return _extract_serially(video_path, jobs, options)
+    return _extract_in_parallel(video_path, jobs, options)
+
+def _new_screenshot_store():
+    """
+    Khali screenshot store banata hai, entries timestamp_seconds -> (approximate, quality, jpeg_bytes)
+    """
+    return {'lock': threading.Lock(), 'entries': {}, 'bytes': 0}
+
+def _store_get(store, timestamp_seconds, approximate_seek, quality):
+    """
+    Store se (jpeg_bytes, approximate) return karta hai agar wo isi quality par extract hua tha aur seek mode se match karta hai
+    """
+    with store['lock']:
+        entry = store['entries'].get(timestamp_seconds)
+    if entry is None or entry[1] != quality:
+        return None
+    # An exact frame serves either toggle setting, a keyframe-snapped one only approximate requests
+    if entry[0] and not approximate_seek:
+        return None
+    return entry[2], entry[0]
+
+def _store_put(store, timestamp_seconds, approximate, quality, jpeg_bytes):
+    """
+    Screenshot store mein rakhta hai, per-video byte limit se upar purane screenshots nikal deta hai
+    """
+    with store['lock']:
+        entries = store['entries']
+        # One entry per timestamp, so changing quality or seek mode replaces instead of adding
+        previous = entries.pop(timestamp_seconds, None)
+        if previous is not None:
+            store['bytes'] -= len(previous[2])
+        
+        entries[timestamp_seconds] = (approximate, quality, jpeg_bytes)
+        store['bytes'] += len(jpeg_bytes)
+        
+        while store['bytes'] > SCREENSHOT_CACHE_BYTES_PER_VIDEO and entries:
+            oldest = next(iter(entries))
+            store['bytes'] -= len(entries.pop(oldest)[2])
+
+def create_zip_file(screenshots):
+    """
+    Screenshots ko zip file mein pack karta hai aur zip ke bytes return karta hai
+    """
+    zip_buffer = io.BytesIO()
+    # JPEGs are already entropy-coded, DEFLATE would burn CPU for <1% size reduction
+    with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_STORED) as zip_file:
+        for screenshot_filename, jpeg_bytes in screenshots:
+            zip_file.writestr(screenshot_filename, jpeg_bytes)
+    
+    return zip_buffer.getvalue()
+
+def extract_screenshots_at_timestamps(video_path, timestamps, approximate_seek=False,
+                                      quality=DEFAULT_JPEG_QUALITY, screenshot_store=None, video_key=None):
+    """
+    Video se user-defined timestamps par screenshots extract karta hai, (filename, jpeg_bytes) list return karta hai
+    
+    screenshot_store diya ho to pehle se extracted screenshots wahan se liye jate hain aur sirf naye decode hote hain
+    video_key GPU decoder ka cache key hai (default video_path), taake har run ka alag path decoder dobara na khole
+    """
+    fps, duration = _probe_video(video_path)
+    
+    screenshots = []
     
     progress_bar = st.progress(0)
     status_text = st.empty()
     
-    timestamps.sort()
+    unique_timestamps = sorted(set(timestamps))
+    duplicates = len(timestamps) - len(unique_timestamps)
+    if duplicates:
+        st.info(f"ℹ️ Removed {duplicates} duplicate timestamp{'s' if duplicates > 1 else ''}.")
+    timestamps = unique_timestamps
     
-    for i, (minutes, seconds) in enumerate(timestamps):
+    use_ffmpeg, use_cuda = _ffmpeg_capabilities()
+    options = {
+        'fps': fps,
+        'use_ffmpeg': use_ffmpeg,
+        'use_cuda': use_cuda,
+        'approximate_seek': approximate_seek,
+        'quality': quality
+    }
+    
+    jobs = []
+    for minutes, seconds in timestamps:
         timestamp_seconds = minutes * 60 + seconds
         
         if timestamp_seconds > duration:
             st.warning(f"⚠️ Timestamp {minutes}m {seconds}s exceeds video duration, skipping.")
             continue
         
-        frame_position = int(timestamp_seconds * fps)
-        cap.set(cv2.CAP_PROP_POS_FRAMES, frame_position)
-        
-        ret, frame = cap.read()
+        screenshot_filename = f"{minutes}-{seconds:02d}.jpg"
+        jobs.append((minutes, seconds, timestamp_seconds, screenshot_filename))
+    
+    if screenshot_store is None:
+        screenshot_store = _new_screenshot_store()
+    
+    cached_results = []
+    missing_jobs = []
+    for job in jobs:
+        cached = _store_get(screenshot_store, job[2], approximate_seek, quality)
+        if cached is not None:
+            cached_results.append((job, *cached))
+        else:
+            missing_jobs.append(job)
+    
+    nvdec = _open_nvdec_decoder(video_key or video_path, video_path) if missing_jobs else None
+    if nvdec is not None and not nvdec['failed']:
+        extracted_results = _extract_with_nvdec(nvdec, video_path, missing_jobs, options)
+    else:
+        extracted_results = _extract_with_ffmpeg_or_opencv(video_path, missing_jobs, options)
+    
+    results = chain(cached_results, extracted_results)
+    
+    # Each progress/status update is a websocket message, only send one per whole percent
+    last_percent = -1
+    for i, ((minutes, seconds, timestamp_seconds, screenshot_filename), jpeg_bytes, approximate) in enumerate(results):
+        percent = (i + 1) * 100 // len(jobs)
+        if percent != last_percent:
+            progress_bar.progress(percent / 100)
         
-        if ret:
-            screenshot_filename = f"{minutes}-{seconds:02d}.jpg"
-            screenshot_path = os.path.join(temp_dir, screenshot_filename)
-            
-            cv2.imwrite(screenshot_path, frame)
-            screenshot_paths.append(screenshot_path)
+        if jpeg_bytes is not None:
+            _store_put(screenshot_store, timestamp_seconds, approximate, quality, jpeg_bytes)
+            screenshots.append((screenshot_filename, jpeg_bytes))
             
-            status_text.text(f"📸 Screenshot {i+1} saved at {minutes}m {seconds}s")
-            
-            progress = (i + 1) / len(timestamps)
-            progress_bar.progress(progress)
+            if percent != last_percent:
+                status_text.text(f"📸 Screenshot {i+1} saved at {minutes}m {seconds}s")
         else:
             st.warning(f"⚠️ Could not capture frame at {minutes}m {seconds}s")
+        
+        last_percent = percent
     
-    cap.release()
+    st.success(f"✅ Total {len(screenshots)} screenshots extracted!")
     
-    st.success(f"✅ Total {len(screenshot_paths)} screenshots extracted!")
+    return screenshots
+
+def _upload_key(uploaded_file):
+    """
+    Upload ke content ka blake2b hash cache key ke taur par return karta hai (per upload ek hi baar compute hota hai)
+    """
+    cached = st.session_state.get('upload_key')
+    if cached and cached[0] == uploaded_file.file_id:
+        return cached[1]
     
-    return screenshot_paths, temp_dir
+    # getbuffer() hashes the in-memory upload without copying it
+    with uploaded_file.getbuffer() as buffer:
+        digest = hashlib.blake2b(buffer, digest_size=16).hexdigest()
+    
+    st.session_state.upload_key = (uploaded_file.file_id, digest)
+    return digest
+
+@st.cache_resource(show_spinner=False, max_entries=SCREENSHOT_CACHE_VIDEOS)
+def _screenshot_store(upload_key):
+    """
+    Ek video ke extracted screenshots ka store, sab sessions mein shared
+    """
+    return _new_screenshot_store()
 
-def create_zip_file(screenshot_paths, temp_dir):
+def _remove_file(path):
     """
-    Screenshots ko zip file mein compress karta hai
+    File delete karta hai, pehle se delete ho to kuch nahi karta
+    """
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
+
+def _delete_spooled_video(spool):
     """
-    zip_path = os.path.join(temp_dir, "screenshots.zip")
+    Cache se evict hui spooled video aur us upload ka cached decoder dono hata deta hai
+    """
+    upload_key, path = spool
+    # The decoder keeps its file open, so that disk space isn't freed until it's dropped too
+    _open_nvdec_decoder.clear(upload_key, None)
+    _remove_file(path)
+
+@st.cache_resource(show_spinner=False, max_entries=SCREENSHOT_CACHE_VIDEOS, on_release=_delete_spooled_video)
+def _spool_upload(upload_key, _uploaded_file):
+    """
+    Upload ko temp video file mein likhta hai, same upload ke reruns par wahi file reuse hoti hai
+    """
+    with tempfile.NamedTemporaryFile(delete=False, suffix='.mp4') as temp_video:
+        _uploaded_file.seek(0)
+        shutil.copyfileobj(_uploaded_file, temp_video, length=1024 * 1024)
     
-    with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zip_file:
-        for screenshot_path in screenshot_paths:
-            arcname = os.path.basename(screenshot_path)
-            zip_file.write(screenshot_path, arcname)
+    # on_release isn't guaranteed to run at shutdown
+    atexit.register(_remove_file, temp_video.name)
+    return upload_key, temp_video.name
+
+@contextmanager
+def _spooled_video(upload_key, uploaded_file):
+    """
+    Is run ke liye spooled video ka private hard link deta hai, run khatam hote hi link delete hota hai
+    """
+    # Eviction or "Clear cache" can delete the cached file mid-run; the link keeps the data
+    # on disk until this run drops it, without copying the video again
+    while True:
+        _, spool_path = _spool_upload(upload_key, uploaded_file)
+        run_path = f"{os.path.splitext(spool_path)[0]}-{uuid.uuid4().hex}.mp4"
+        try:
+            os.link(spool_path, run_path)
+            break
+        except FileNotFoundError:
+            # Evicted between the cache lookup and the link, spool it again
+            _spool_upload.clear(upload_key, uploaded_file)
     
-    return zip_path
+    try:
+        yield run_path
+    finally:
+        _remove_file(run_path)
 
 def parse_bulk_timestamps(text):
     """
     Convert bulk timestamp text (e.g., "1:23\n5:2\n2:39") to a list of (minute, second) tuples
     """
-    timestamps = []
-    pattern = r'(\d+):(\d+)'
-    
-    for line in text.strip().split('\n'):
-        line = line.strip()
-        if not line:
-            continue
-            
-        match = re.match(pattern, line)
-        if match:
-            minutes = int(match.group(1))
-            seconds = int(match.group(2))
-            if seconds > 59:
-                seconds = 59
-            timestamps.append((minutes, seconds))
-    
-    return timestamps
+    return [
+        (int(minutes), min(int(seconds), 59))
+        for minutes, seconds in TIMESTAMP_PATTERN.findall(text)
+    ]
 
 def main():
     st.set_page_config(
@@ -99,6 +570,8 @@ def main():
     
     st.title("📹 Video Screenshot Extractor")
     
+    _log_jpeg_backend()
+    
     uploaded_file = st.file_uploader(
         "Video Upload",
         type=['mp4', 'avi', 'mov', 'mkv', 'wmv', 'flv', 'webm']
@@ -117,6 +590,17 @@ def main():
         st.session_state.bulk_timestamps_text = bulk_timestamps_text
         
         timestamps = parse_bulk_timestamps(bulk_timestamps_text)
+        
+        approximate_seek = st.checkbox(
+            "Approximate seek (fast)",
+            value=False,
+            help="Uses the nearest keyframe before each timestamp instead of the exact frame. "
+                 "Much faster on long videos, but screenshots may be a few seconds early. "
+                 "Only applies when timestamps are sought one at a time with ffmpeg; frames decoded "
+                 "on the GPU, with OpenCV, or in one pass for closely spaced timestamps are always exact."
+        )
+        
+        quality = st.slider("JPEG quality", min_value=50, max_value=100, value=DEFAULT_JPEG_QUALITY)
     
         if st.button("Process Video", type="primary"):
             if len(timestamps) == 0:
@@ -124,29 +608,29 @@ def main():
             else:
                 with st.spinner("Processing video... Please wait..."):
                     try:
-                        with tempfile.NamedTemporaryFile(delete=False, suffix='.mp4') as temp_video:
-                            temp_video.write(uploaded_file.read())
-                            temp_video_path = temp_video.name
+                        upload_key = _upload_key(uploaded_file)
                         
-                        screenshot_paths, temp_dir = extract_screenshots_at_timestamps(temp_video_path, timestamps)
+                        with _spooled_video(upload_key, uploaded_file) as temp_video_path:
+                            screenshots = extract_screenshots_at_timestamps(
+                                temp_video_path, timestamps, approximate_seek, quality,
+                                screenshot_store=_screenshot_store(upload_key), video_key=upload_key
+                            )
                         
-                        if screenshot_paths:
-                            zip_path = create_zip_file(screenshot_paths, temp_dir)
-                            
-                            with open(zip_path, 'rb') as zip_file:
-                                st.download_button(
-                                    label="Download Screenshots ZIP",
-                                    data=zip_file.read(),
-                                    file_name=f"screenshots_{uploaded_file.name.split('.')[0]}.zip",
-                                    mime="application/zip",
-                                    type="primary"
-                                )
+                        if screenshots:
+                            # Deferred: the zip is only assembled when the button is clicked. Until then the
+                            # session only references the JPEG bytes, which it shares with the screenshot store
+                            st.download_button(
+                                label="Download Screenshots ZIP",
+                                data=partial(create_zip_file, screenshots),
+                                file_name=f"screenshots_{uploaded_file.name.split('.')[0]}.zip",
+                                mime="application/zip",
+                                on_click="ignore",
+                                type="primary"
+                            )
                         
                         else:
                             st.error("No screenshots could be extracted from the video.")
                         
-                        os.unlink(temp_video_path)
-                        
                     except Exception as e:
                         st.error(f"Error processing video: {str(e)}")
 